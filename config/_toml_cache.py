@@ -0,0 +1,31 @@
+# config/_toml_cache.py
+from __future__ import annotations
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+import copy
+import os
+
+try:
+    import tomllib  # py3.11+
+except ModuleNotFoundError:  # pragma: no cover
+    raise RuntimeError("Python 3.11+ required for tomllib. Use a newer Python or install tomli.")
+
+
+@lru_cache(maxsize=8)
+def _parse(path: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    # mtime_ns/size are only part of the cache key: an edited file re-parses.
+    # Binary mode lets tomllib parse the bytes without a separate decode pass.
+    with open(path, "rb") as f:
+        return tomllib.load(f)
+
+
+def load_root_toml(path: Path) -> dict[str, Any]:
+    """
+    Parse config.toml once per (path, mtime, size) and share the result.
+      - Raises FileNotFoundError / tomllib.TOMLDecodeError like a plain parse
+      - Returns a deep copy, so a caller mutating its dict can't poison the cache
+    """
+    st = os.stat(path)
+    return copy.deepcopy(_parse(str(path), st.st_mtime_ns, st.st_size))
@@ -3,15 +3,22 @@ from __future__ import annotations
 from dataclasses import dataclass
 from pathlib import Path
 import os
+import re
 
-try:
-    import tomllib  # py3.11+
-except ModuleNotFoundError:  # pragma: no cover
-    raise RuntimeError("Python 3.11+ required for tomllib. Use a newer Python or install tomli.")
+from config._toml_cache import load_root_toml
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_TOML_PATH = PROJECT_ROOT / "config.toml"
 
+# KEY=VALUE, VALUE optionally "double" / 'single' quoted, optional " # comment".
+# [ \t] rather than \s so an empty value can't run onto the next line.
+_ENV_RE = re.compile(
+    rb'^[ \t]*([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*'
+    rb'(?:"([^"\r\n]*)"|\'([^\'\r\n]*)\'|([^\r\n]*?))'
+    rb'[ \t]*(?:[ \t]#[^\r\n]*)?\r?$',
+    re.MULTILINE,
+)
+
 
 @dataclass(frozen=True)
 class InfluxSettings:
@@ -32,28 +39,26 @@ def _load_env_file_if_present(path: Path) -> None:
     """
     Minimal .env loader:
       - Does NOT override existing environment variables
-      - Ignores comments/blank lines
+      - Ignores comments/blank lines (and trailing " # comments")
       - Supports KEY=VALUE (optionally quoted)
     """
     if not path.exists():
         return
 
-    for raw_line in path.read_text(encoding="utf-8").splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
+    for m in _ENV_RE.finditer(path.read_bytes()):
+        key = m.group(1).decode("utf-8")
 
         # Do not overwrite real environment
-        if key and key not in os.environ:
-            os.environ[key] = value
+        if key in os.environ:
+            continue
+
+        dq, sq, bare = m.group(2, 3, 4)
+        value = dq if dq is not None else sq if sq is not None else bare
+        os.environ[key] = value.decode("utf-8")
 
 
 def load_influx_settings(toml_path: Path = DEFAULT_TOML_PATH) -> InfluxSettings:
-    raw = tomllib.loads(toml_path.read_text(encoding="utf-8"))
+    raw = load_root_toml(toml_path)
 
     influx = raw.get("influx", {})
     poller = raw.get("poller", {})
@@ -2,9 +2,10 @@
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable
 import warnings
 
+from config._toml_cache import load_root_toml
 from util.modbus import resolve_modbus_port
 
 try:
@@ -15,6 +16,35 @@ except ModuleNotFoundError:  # pragma: no cover
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DEFAULT_TOML_PATH = PROJECT_ROOT / "config.toml"
 
+# Everything below ABNORMAL_CODES is computed lazily (PEP 562 __getattr__):
+# importing this module for one constant doesn't parse the whole config or
+# stat serial ports. First access computes the value and caches it in globals().
+__all__ = [
+    "PROJECT_ROOT",
+    "DEFAULT_TOML_PATH",
+    "ABNORMAL_CODES",
+    "METHOD",
+    "SERIAL_PORT",
+    "SERIAL_BUSES",
+    "BUS_UNIT_IDS",
+    "BAUDRATE",
+    "BYTESIZE",
+    "STOPBITS",
+    "PARITY",
+    "TIMEOUT",
+    "NUM_PZEMS",
+    "PZEM_IDS",
+    "PZEM_IDS_SET",
+    "DEFAULT_SHUNT_CODE",
+    "PZEM_SHUNT_CODES",
+    "LABELS",
+    "SCAN_START_ID",
+    "SCAN_END_ID",
+    "SCAN_VERBOSE",
+    "SCAN_TRY_PARAMS",
+    "SCAN_PER_ID_DELAY_S",
+]
+
 
 # -----------------------------
 # Static / protocol constants
@@ -32,107 +62,174 @@ ABNORMAL_CODES = {
 # -----------------------------
 def _load_root_toml(path: Path = DEFAULT_TOML_PATH) -> dict[str, Any]:
     try:
-        return tomllib.loads(path.read_text(encoding="utf-8"))
-    except FileNotFoundError:
-        return {}
-    except Exception:
-        # Don’t crash import-time; fall back to defaults
+        return load_root_toml(path)
+    except (OSError, UnicodeDecodeError, tomllib.TOMLDecodeError):
+        # Missing/unreadable/malformed: don’t crash import-time; fall back to defaults
         return {}
 
 
-_RAW = _load_root_toml(DEFAULT_TOML_PATH)
+def _get(name: str) -> Any:
+    """Module-internal access to a lazy attribute (bare globals skip __getattr__)."""
+    g = globals()
+    return g[name] if name in g else __getattr__(name)
+
+
+# Sections (may be missing). Read-only views of the parsed TOML: never mutated,
+# so no defensive dict() copy.
+def _raw() -> dict[str, Any]:
+    return _load_root_toml(DEFAULT_TOML_PATH)
+
+
+def _modbus() -> dict[str, Any]:
+    return _get("_RAW").get("modbus") or {}
 
-# Sections (may be missing)
-_MODBUS = dict(_RAW.get("modbus", {}) or {})
-_SCAN = dict(_RAW.get("scan", {}) or {})
-_PZEM = dict(_RAW.get("pzem", {}) or {})  # optional; you can add later
+
+def _scan() -> dict[str, Any]:
+    return _get("_RAW").get("scan") or {}
+
+
+def _pzem() -> dict[str, Any]:
+    return _get("_RAW").get("pzem") or {}  # optional; you can add later
 
 
 # -----------------------------
 # Modbus serial settings
 # (these names are imported by util/pzem.py, so keep them)
 # -----------------------------
-METHOD = str(_MODBUS.get("method", "rtu"))  # optional; poller already guards version differences
+def _serial_port() -> str:
+    # choose from modbus.ports/port_candidates if present, else modbus.port;
+    # this is the only path that stats /dev/tty* nodes
+    return resolve_modbus_port(_get("_MODBUS"))
+
+
+def _serial_buses() -> list[str]:
+    # modbus.buses: ports wired to *separate* RS485 buses that can be read in
+    # parallel (unlike modbus.ports, which are alternatives for one bus).
+    # Either a list of ports or a {port = [unit ids]} table.
+    buses = _get("_MODBUS").get("buses") or []
+    return [str(p) for p in ([buses] if isinstance(buses, str) else buses)]
 
-# UPDATED: choose from modbus.ports/port_candidates if present, else modbus.port
-SERIAL_PORT = resolve_modbus_port(_MODBUS)
 
-BAUDRATE = int(_MODBUS.get("baudrate", 9600))
-BYTESIZE = int(_MODBUS.get("bytesize", 8))
-STOPBITS = int(_MODBUS.get("stopbits", 1))
-PARITY = str(_MODBUS.get("parity", "N"))
-TIMEOUT = float(_MODBUS.get("timeout_s", 1.0))
+def _bus_unit_ids() -> dict[str, list[int]]:
+    # Which unit IDs live on which bus; a plain list means "any of PZEM_IDS"
+    buses = _get("_MODBUS").get("buses") or []
+    if isinstance(buses, dict):
+        return {
+            str(port): [uid for u in (ids or []) if (uid := _to_int(u)) is not None]
+            for port, ids in buses.items()
+        }
+    return {port: list(_get("PZEM_IDS")) for port in _get("SERIAL_BUSES")}
 
 
 # -----------------------------
 # Device layout / defaults
 # -----------------------------
-def _as_int_key_dict(d: Any) -> dict[int, Any]:
+def _to_int(k: Any) -> int | None:
     """
-    TOML keys may come in as str or int.
-    Normalize to {int: value}.
+    TOML keys (and some values) may come in as str or int.
+    Returns the int, or None if it isn't one. Plain digit strings skip
+    the try/except; only odd inputs (e.g. " 3") fall back to int().
     """
-    out: dict[int, Any] = {}
-    if not isinstance(d, dict):
-        return out
-    for k, v in d.items():
-        try:
-            out[int(k)] = v
-        except Exception:
-            continue
-    return out
-
-
-_NUM_FROM_PZEM = _PZEM.get("device_count", None)
-if _NUM_FROM_PZEM is not None:
-    NUM_PZEMS = int(_NUM_FROM_PZEM)
-else:
-    NUM_PZEMS = int(_SCAN.get("end_id", 1)) if int(_SCAN.get("end_id", 1)) >= 1 else 1
-
-PZEM_IDS = list(range(1, NUM_PZEMS + 1))
-
-DEFAULT_SHUNT_CODE = int(_PZEM.get("default_shunt_code", 0x0001))
-
-_SHUNT_OVERRIDES_RAW = _PZEM.get("shunt_codes", {})
-_SHUNT_OVERRIDES = _as_int_key_dict(_SHUNT_OVERRIDES_RAW)
-
-
-def _warn_out_of_range_keys(raw: Any, label: str) -> None:
-    if not isinstance(raw, dict):
-        return
-    out_of_range: list[int] = []
-    for key in raw.keys():
-        try:
-            key_int = int(key)
-        except Exception:
-            continue
-        if key_int not in PZEM_IDS:
-            out_of_range.append(key_int)
+    if isinstance(k, int):
+        return k
+    if isinstance(k, str) and k.removeprefix("-").isdecimal():
+        return int(k)
+    try:
+        return int(k)
+    except (ValueError, TypeError):
+        return None
+
+
+def _as_int_key_dict(d: dict[Any, Any]) -> dict[int, Any]:
+    """
+    Normalize to {int: value}, dropping non-integer keys.
+    """
+    return {ik: v for k, v in d.items() if (ik := _to_int(k)) is not None}
+
+
+def _num_pzems() -> int:
+    num_from_pzem = _get("_PZEM").get("device_count", None)
+    if num_from_pzem is not None:
+        return int(num_from_pzem)
+    end_id = int(_get("_SCAN").get("end_id", 1))
+    return end_id if end_id >= 1 else 1
+
+
+def _warn_out_of_range_keys(raw: dict[Any, Any], label: str) -> None:
+    pzem_ids_set = _get("PZEM_IDS_SET")
+    out_of_range: set[int] = set()  # dedups as it goes
+    for key in raw:
+        key_int = key if isinstance(key, int) else _to_int(key)
+        if key_int is not None and key_int not in pzem_ids_set:
+            out_of_range.add(key_int)
     if out_of_range:
-        unique = sorted(set(out_of_range))
         warnings.warn(
-            f"{label} keys {unique} are outside configured PZEM_IDS {PZEM_IDS}. "
+            f"{label} keys {sorted(out_of_range)} are outside configured PZEM_IDS {_get('PZEM_IDS')}. "
             "Update pzem.device_count or remove/adjust keys.",
             RuntimeWarning,
         )
 
 
-_warn_out_of_range_keys(_SHUNT_OVERRIDES_RAW, "pzem.shunt_codes")
+def _pzem_shunt_codes() -> dict[int, int]:
+    # `or {}` here (not per-helper isinstance checks) covers a missing/empty table
+    shunt_overrides_raw = _get("_PZEM").get("shunt_codes") or {}
+    _warn_out_of_range_keys(shunt_overrides_raw, "pzem.shunt_codes")
+
+    # Derive once: defaults for every unit, overlaid with valid in-range overrides
+    pzem_ids_set = _get("PZEM_IDS_SET")
+    default_code = _get("DEFAULT_SHUNT_CODE")
+    return {
+        **{device_id: default_code for device_id in _get("PZEM_IDS")},
+        **{
+            device_id: code_int
+            for device_id, code in _as_int_key_dict(shunt_overrides_raw).items()
+            if device_id in pzem_ids_set and (code_int := _to_int(code)) is not None
+        },
+    }
+
+
+def _labels() -> dict[str, str]:
+    labels_raw = _get("_PZEM").get("labels") or {}
+    _warn_out_of_range_keys(labels_raw, "pzem.labels")
+    return {str(k): str(v) for k, v in labels_raw.items()}
+
+
+_LAZY: dict[str, Callable[[], Any]] = {
+    "_RAW": _raw,
+    "_MODBUS": _modbus,
+    "_SCAN": _scan,
+    "_PZEM": _pzem,
+    "METHOD": lambda: str(_get("_MODBUS").get("method", "rtu")),  # optional; poller already guards version differences
+    "SERIAL_PORT": _serial_port,
+    "SERIAL_BUSES": _serial_buses,
+    "BUS_UNIT_IDS": _bus_unit_ids,
+    "BAUDRATE": lambda: int(_get("_MODBUS").get("baudrate", 9600)),
+    "BYTESIZE": lambda: int(_get("_MODBUS").get("bytesize", 8)),
+    "STOPBITS": lambda: int(_get("_MODBUS").get("stopbits", 1)),
+    "PARITY": lambda: str(_get("_MODBUS").get("parity", "N")),
+    "TIMEOUT": lambda: float(_get("_MODBUS").get("timeout_s", 1.0)),
+    "NUM_PZEMS": _num_pzems,
+    "PZEM_IDS": lambda: list(range(1, _get("NUM_PZEMS") + 1)),
+    "PZEM_IDS_SET": lambda: frozenset(_get("PZEM_IDS")),
+    "DEFAULT_SHUNT_CODE": lambda: int(_get("_PZEM").get("default_shunt_code", 0x0001)),
+    "PZEM_SHUNT_CODES": _pzem_shunt_codes,
+    "LABELS": _labels,
+    "SCAN_START_ID": lambda: int(_get("_SCAN").get("start_id", 1)),
+    "SCAN_END_ID": lambda: int(_get("_SCAN").get("end_id", max(_get("NUM_PZEMS"), 1))),
+    "SCAN_VERBOSE": lambda: bool(_get("_SCAN").get("verbose", False)),
+    "SCAN_TRY_PARAMS": lambda: bool(_get("_SCAN").get("try_params", True)),
+    "SCAN_PER_ID_DELAY_S": lambda: float(_get("_SCAN").get("per_id_delay_s", 0.6)),
+}
+
 
-PZEM_SHUNT_CODES = {device_id: DEFAULT_SHUNT_CODE for device_id in PZEM_IDS}
-for device_id, code in _SHUNT_OVERRIDES.items():
-    if device_id in PZEM_SHUNT_CODES:
-        try:
-            PZEM_SHUNT_CODES[device_id] = int(code)
-        except Exception:
-            pass
+def __getattr__(name: str) -> Any:
+    factory = _LAZY.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = factory()
+    globals()[name] = value
+    return value
 
-_LABELS_RAW = _PZEM.get("labels", {})
-_warn_out_of_range_keys(_LABELS_RAW, "pzem.labels")
-LABELS = {str(k): str(v) for k, v in (_LABELS_RAW.items() if isinstance(_LABELS_RAW, dict) else [])}
 
-SCAN_START_ID = int(_SCAN.get("start_id", 1))
-SCAN_END_ID = int(_SCAN.get("end_id", max(NUM_PZEMS, 1)))
-SCAN_VERBOSE = bool(_SCAN.get("verbose", False))
-SCAN_TRY_PARAMS = bool(_SCAN.get("try_params", True))
-SCAN_PER_ID_DELAY_S = float(_SCAN.get("per_id_delay_s", 0.6))
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(__all__))
@@ -1,45 +1,18 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
-import inspect
 from pathlib import Path
-from typing import Any, Dict
 
-from pymodbus.client import ModbusSerialClient
-
-from util.pzem import read_pzem
+from config._toml_cache import load_root_toml
+from util.pzem import make_modbus_client, read_pzem
 
 def project_root() -> Path:
     return Path(__file__).resolve().parents[2]
 
-def load_root_toml(path: Path) -> dict:
-    try:
-        import tomllib
-    except ModuleNotFoundError:
-        import tomli as tomllib  # type: ignore
-    return tomllib.loads(path.read_text(encoding="utf-8"))
-
-def make_modbus_client(cfg: dict) -> ModbusSerialClient:
-    m = cfg["modbus"]
-    kwargs: Dict[str, Any] = dict(
-        port=str(m["port"]),
-        baudrate=int(m.get("baudrate", 9600)),
-        bytesize=int(m.get("bytesize", 8)),
-        parity=str(m.get("parity", "N")),
-        stopbits=int(m.get("stopbits", 1)),
-        timeout=float(m.get("timeout_s", 1.0)),
-    )
-    try:
-        sig = inspect.signature(ModbusSerialClient.__init__)
-        if "method" in sig.parameters:
-            kwargs["method"] = str(m.get("method", "rtu"))
-    except Exception:
-        pass
-    return ModbusSerialClient(**kwargs)
-
 def main() -> None:
     raw = load_root_toml(project_root() / "config.toml")
-    client = make_modbus_client(raw)
+    # Serial settings come from config.pzem (same config.toml); keep the explicit modbus.port
+    client = make_modbus_client(str(raw["modbus"]["port"]))
     if not client.connect():
         raise SystemExit("Could not open serial port")
 
@@ -1,7 +1,33 @@
-from util.pzem import pzem_client, read_pzem
-from config.pzem import PZEM_IDS
+from concurrent.futures import ThreadPoolExecutor
 
-with pzem_client() as client:
-    # Read all devices
-    for ID in PZEM_IDS:
-        reading = read_pzem(client, ID)
+from util.pzem import pzem_client, pzem_clients, read_pzem
+from config.pzem import PZEM_IDS, SERIAL_BUSES, BUS_UNIT_IDS
+
+
+def read_bus(client, unit_ids):
+    # One thread per bus: each blocks on its own serial FD, so the buses overlap.
+    # Units stay sequential within a bus (RS485 is half-duplex).
+    return {ID: read_pzem(client, ID, verbose=False) for ID in unit_ids}
+
+
+if len(SERIAL_BUSES) > 1:
+    with pzem_clients(SERIAL_BUSES) as clients:
+        with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+            futures = {
+                port: pool.submit(read_bus, client, BUS_UNIT_IDS.get(port, []))
+                for port, client in zip(SERIAL_BUSES, clients)
+            }
+            results = {port: f.result() for port, f in futures.items()}
+
+    # Print after the fact so output from different buses doesn't interleave
+    for port, readings in results.items():
+        for ID, reading in readings.items():
+            if reading is None:
+                print(f"[{port}] unit {ID}: no response")
+            else:
+                print(f"[{port}] unit {ID}: {reading.voltage:.2f} V, {reading.current:.2f} A, {reading.power:.1f} W")
+else:
+    with pzem_client() as client:
+        # Read all devices
+        for ID in PZEM_IDS:
+            reading = read_pzem(client, ID)
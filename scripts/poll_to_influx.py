@@ -1,38 +1,43 @@
 #!/usr/bin/env python3
 from __future__ import annotations
 
+import array
 import time
 from pathlib import Path
-from typing import Dict, Any, Optional
-
-from pymodbus.client import ModbusSerialClient
+from typing import TYPE_CHECKING, Dict, Optional
 
+from config._toml_cache import load_root_toml
 from config.influx import load_influx_settings
 from config import pzem as pzem_config
-from util.influx import InfluxClient, pzem_reading_to_lp
-from util.modbus import resolve_modbus_port
+from util.influx import BufferedInfluxWriter, InfluxClient, make_pzem_lp_formatter
+from util.modbus import clear_port_cache, port_usable, resolve_modbus_port, resolve_modbus_ports
 
 # Use PZEM utilities (this is the point of util/pzem.py)
-from util.pzem import read_pzem, make_modbus_client, read_params, set_shunt_code
+from util.pzem import (
+    SHARED_CLIENT_LOCK,
+    close_shared_client,
+    get_shared_client,
+    read_params,
+    read_pzem,
+    set_shunt_code,
+)
 
+# pymodbus is only imported when util.pzem actually builds a client.
+if TYPE_CHECKING:
+    from pymodbus.client import ModbusSerialClient
 
-def project_root() -> Path:
-    return Path(__file__).resolve().parents[1]
 
+# Silence streaks worth logging: a few early ones, then every _SILENCE_LOG_MODULO.
+_SILENCE_LOG_POINTS = frozenset({1, 5, 10, 30, 60, 120, 300})
+_SILENCE_LOG_MODULO = 600
 
-def load_root_toml(path: Path) -> dict:
-    try:
-        import tomllib  # py3.11+
-    except ModuleNotFoundError:  # pragma: no cover
-        import tomli as tomllib  # type: ignore
-    return tomllib.loads(path.read_text(encoding="utf-8"))
 
+def project_root() -> Path:
+    return Path(__file__).resolve().parents[1]
 
 
 def _should_log_silence(streak: int) -> bool:
-    if streak in (1, 5, 10, 30, 60, 120, 300):
-        return True
-    return streak > 0 and streak % 600 == 0
+    return streak in _SILENCE_LOG_POINTS or (streak > 0 and streak % _SILENCE_LOG_MODULO == 0)
 
 
 def modbus_socket_looks_broken(client: ModbusSerialClient) -> bool:
@@ -57,14 +62,15 @@ def _set_util_port(selected_port: str) -> None:
 
 def connect_modbus(raw_cfg: dict) -> ModbusSerialClient:
     """
-    Choose port, patch util config, create client via util.pzem.make_modbus_client(),
-    then connect.
+    Choose port, patch util config, then open the process-wide client via
+    util.pzem.get_shared_client() (connected, serial timeouts configured).
     """
     selected_port = resolve_modbus_port(raw_cfg)
     _set_util_port(selected_port)
 
-    client = make_modbus_client()
-    if not client.connect():
+    try:
+        client = get_shared_client(selected_port)
+    except RuntimeError:
         if selected_port in ("/dev/serial0", "/dev/ttyAMA0", "/dev/ttyS0"):
             print("[HINT] If you're on Raspberry Pi, make sure serial console/login shell is disabled and UART is enabled.")
         raise RuntimeError(f"Could not open Modbus port {selected_port}")
@@ -80,24 +86,36 @@ def reconnect_modbus(
     base_delay_s: float,
 ) -> ModbusSerialClient:
     """
-    Close + reconnect with retries, re-resolving port each time.
-    Uses util.pzem.make_modbus_client() for actual client creation.
+    Close + reconnect with retries. All configured ports stay in the rotation;
+    each attempt skips past ports that are missing/unusable right now (checks
+    are cached for a few seconds), so a port that re-appears under another name
+    after a USB bounce is picked up on a later attempt. A port that fails to
+    connect twice is rotated to the back.
+    Reopens the shared client from util.pzem (old_client is that same client,
+    so closing the shared one closes it).
     """
-    if old_client is not None:
-        try:
-            old_client.close()
-        except Exception:
-            pass
+    close_shared_client()
 
     last_err: Optional[Exception] = None
+    # The port may have just vanished/reappeared (USB bounce): don't trust cached checks
+    clear_port_cache()
+    ports = resolve_modbus_ports(raw_cfg)
+    port_failures = 0
 
     for i in range(1, attempts + 1):
-        selected_port = resolve_modbus_port(raw_cfg)
+        # Bring the first currently usable port to the front; if none is, the
+        # order is unchanged and the head is tried anyway (connect() decides)
+        for _ in range(len(ports)):
+            if port_usable(ports[0]):
+                break
+            ports.append(ports.pop(0))
+            port_failures = 0
+        selected_port = ports[0]
         _set_util_port(selected_port)
 
-        client = make_modbus_client()
         try:
-            ok = client.connect()
+            client = get_shared_client(selected_port)
+            ok = True
         except Exception as e:
             ok = False
             last_err = e
@@ -106,11 +124,14 @@ def reconnect_modbus(
             print(f"[INFO] Modbus reconnect succeeded on attempt {i} (port={selected_port}).")
             return client
 
+        port_failures += 1
+        if len(ports) > 1 and port_failures >= 2:
+            ports.append(ports.pop(0))
+            port_failures = 0
+
         delay = min(base_delay_s * i, 10.0)
-        if last_err is not None:
-            print(f"[WARN] Modbus reconnect attempt {i}/{attempts} failed (port={selected_port}): {last_err}. Sleeping {delay:.1f}s.")
-        else:
-            print(f"[WARN] Modbus reconnect attempt {i}/{attempts} failed (port={selected_port}, connect()=False). Sleeping {delay:.1f}s.")
+        # connect()=False surfaces as get_shared_client()'s "Could not open ..." error
+        print(f"[WARN] Modbus reconnect attempt {i}/{attempts} failed (port={selected_port}): {last_err}. Sleeping {delay:.1f}s.")
         time.sleep(delay)
 
     raise SystemExit(f"Modbus reconnect failed after {attempts} attempts. Last error: {last_err}")
@@ -165,6 +186,9 @@ def main() -> None:
 
     silent_backoff_s = float(poller.get("silent_backoff_s", 0.0))
     influx_retry_delay_s = float(poller.get("influx_retry_delay_s", 2.0))
+    write_batch_max_lines = int(poller.get("write_batch_max_lines", 5000))
+    write_batch_max_age_s = float(poller.get("write_batch_max_age_s", 2.0))
+    write_in_background = bool(poller.get("write_in_background", True))
 
     hard_reconnect_after_iters = int(poller.get("modbus_reconnect_after_hard_error_iters", 3))
     soft_reconnect_after_iters = int(poller.get("modbus_reconnect_after_all_silent_iters", 0))
@@ -188,84 +212,80 @@ def main() -> None:
     except Exception as e:
         print(f"[WARN] Influx health check failed at startup: {e}")
 
+    writer = BufferedInfluxWriter(
+        influx,
+        max_lines=write_batch_max_lines,
+        max_age_s=write_batch_max_age_s,
+        background=write_in_background,
+    )
+
     client: Optional[ModbusSerialClient] = None
     try:
         client = connect_modbus(raw_cfg)
 
-        _apply_shunt_codes(
-            client,
-            unit_ids=unit_ids,
-            shunt_codes=pzem_config.PZEM_SHUNT_CODES,
-            apply_changes=apply_shunt_codes,
-        )
-
-        silent_streak: Dict[int, int] = {uid: 0 for uid in unit_ids}
+        with SHARED_CLIENT_LOCK:
+            _apply_shunt_codes(
+                client,
+                unit_ids=unit_ids,
+                shunt_codes=pzem_config.PZEM_SHUNT_CODES,
+                apply_changes=apply_shunt_codes,
+            )
+
+        # Per-unit counters, indexed by position in unit_ids
+        silent_streak = array.array("I", [0] * len(unit_ids))
+
+        # Labels and tag sets never change while polling; build them (and the
+        # escaped row templates) once
+        resolved_labels = {uid: str(labels.get(str(uid), f"unit{uid}")) for uid in unit_ids}
+        lp_formatters = {
+            uid: make_pzem_lp_formatter(measurement, {**global_tags, "label": resolved_labels[uid]})
+            for uid in unit_ids
+        }
 
         consecutive_hard_error_iters = 0
         consecutive_all_silent_iters = 0
         ever_had_success = False
 
         while True:
+            cycle_start = time.monotonic()
             hard_error_this_iter = modbus_socket_looks_broken(client)
 
-            lines: list[str] = []
             any_success = False
             loop_ts: Optional[int] = None
 
-            for unit_id in unit_ids:
-                label = labels.get(str(unit_id), f"unit{unit_id}")
+            for idx, unit_id in enumerate(unit_ids):
+                label = resolved_labels[unit_id]
 
                 try:
-                    reading = read_pzem(
-                        client,
-                        unit_id=unit_id,
-                        label=label,
-                        verbose=False,
-                        log_errors=False,
-                    )
+                    with SHARED_CLIENT_LOCK:
+                        reading = read_pzem(
+                            client,
+                            unit_id=unit_id,
+                            label=label,
+                            verbose=False,
+                            log_errors=False,
+                        )
                 except Exception as e:
                     hard_error_this_iter = True
-                    silent_streak[unit_id] += 1
-                    if _should_log_silence(silent_streak[unit_id]):
+                    silent_streak[idx] += 1
+                    if _should_log_silence(silent_streak[idx]):
                         print(f"[INFO] Unit {unit_id} ({label}) read exception (treated as no data): {e}")
                     continue
 
                 if reading is None:
-                    silent_streak[unit_id] += 1
-                    if _should_log_silence(silent_streak[unit_id]):
+                    silent_streak[idx] += 1
+                    if _should_log_silence(silent_streak[idx]):
                         print(f"[INFO] Unit {unit_id} ({label}) no response (likely <~7V); skipping write.")
                     continue
 
                 any_success = True
                 ever_had_success = True
-                silent_streak[unit_id] = 0
-
-                fields: Dict[str, Any] = {
-                    "voltage": float(reading.voltage),
-                    "current": float(reading.current),
-                    "power": float(reading.power),
-                    "energy_wh": int(reading.energy_wh),
-                    "raw_hv": int(reading.raw_hv),
-                    "raw_lv": int(reading.raw_lv),
-                }
-
-                tags = {
-                    **global_tags,
-                    "label": str(label),
-                }
+                silent_streak[idx] = 0
 
                 if loop_ts is None:
                     loop_ts = time.time_ns()
 
-                lines.append(
-                    pzem_reading_to_lp(
-                        measurement=measurement,
-                        unit_id=unit_id,
-                        fields=fields,
-                        tags=tags,
-                        ts_ns=loop_ts,
-                    )
-                )
+                writer.add(lp_formatters[unit_id](reading, loop_ts))
 
             if any_success:
                 consecutive_hard_error_iters = 0
@@ -310,24 +330,31 @@ def main() -> None:
                 consecutive_hard_error_iters = 0
                 consecutive_all_silent_iters = 0
 
-            if lines:
-                try:
-                    influx.write_lp("\n".join(lines) + "\n")
-                except Exception as e:
-                    print(f"[WARN] Influx write failed (will continue): {e}")
-                    time.sleep(influx_retry_delay_s)
+            # Deliberate extra pauses, on top of the regular interval
+            pause_s = 0.0
+
+            # Posts once the batch is big/old enough; empty or young batches cost nothing.
+            # In background mode this only hands the batch off (errors show up a cycle later).
+            try:
+                writer.flush_if_due()
+            except Exception as e:
+                print(f"[WARN] Influx write failed (will continue): {e}")
+                pause_s += influx_retry_delay_s
 
             if (not any_success) and silent_backoff_s > 0:
-                time.sleep(silent_backoff_s)
+                pause_s += silent_backoff_s
 
-            time.sleep(poll_interval)
+            # Sleep only what's left of the interval, so Modbus/HTTP time doesn't stretch the cadence
+            time.sleep(max(0.0, poll_interval - (time.monotonic() - cycle_start)) + pause_s)
 
     finally:
-        if client is not None:
-            try:
-                client.close()
-            except Exception:
-                pass
+        # Don't lose the partially filled batch on shutdown (waits for a background write)
+        try:
+            writer.close()
+        except Exception as e:
+            print(f"[WARN] Final Influx flush failed: {e}")
+
+        close_shared_client()
 
 
 if __name__ == "__main__":
@@ -1,13 +1,20 @@
 from __future__ import annotations
 
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Any, Optional
+from typing import TYPE_CHECKING, Any, Callable, Optional
+import gzip
 import time
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from config.influx import InfluxSettings
 
+if TYPE_CHECKING:
+    from util.pzem import PzemReading
+
 
 class InfluxAuthError(RuntimeError):
     pass
@@ -50,18 +57,26 @@ def _auth_headers(token: str) -> dict[str, str]:
     }
 
 
+# Line protocol escaping: one translate() pass; each special char maps to
+# itself prefixed with a backslash (translate accepts multi-char replacements).
+_LP_TAG_ESCAPES = str.maketrans({c: "\\" + c for c in "\\ ,="})
+_LP_MEASUREMENT_ESCAPES = str.maketrans({c: "\\" + c for c in "\\ ,"})
+
+
 def _lp_escape_tag(s: str) -> str:
-    # Line protocol tag escaping: commas, spaces, equals
-    return (
-        s.replace("\\", "\\\\")
-         .replace(" ", "\\ ")
-         .replace(",", "\\,")
-         .replace("=", "\\=")
-    )
+    # Line protocol tag escaping: backslashes, commas, spaces, equals
+    return s.translate(_LP_TAG_ESCAPES)
 
 
 def _lp_escape_measurement(s: str) -> str:
-    return s.replace("\\", "\\\\").replace(" ", "\\ ").replace(",", "\\,")
+    return s.translate(_LP_MEASUREMENT_ESCAPES)
+
+
+# Per-call header overrides; auth + Accept live on the session.
+_LP_HEADERS = {"Content-Type": "text/plain; charset=utf-8"}
+_LP_GZIP_HEADERS = {**_LP_HEADERS, "Content-Encoding": "gzip"}
+_GZIP_MIN_BYTES = 1024
+_JSON_HEADERS = {"Content-Type": "application/json"}
 
 
 @dataclass(frozen=True)
@@ -82,18 +97,43 @@ class InfluxClient:
         self.base_url = _require_url(getattr(settings, "host_url", "") or getattr(settings, "base_url", ""))
         self._session = requests.Session()
 
-    def _timeout(self) -> float:
+        # Resolved once; passed straight to every request
         try:
-            return float(self.settings.timeout_s)
+            self._default_timeout = float(settings.timeout_s)
         except Exception:
-            return 5.0
+            self._default_timeout = 5.0
+
+        # Set auth once; an empty token still raises on the first request (see _require_auth).
+        if settings.token:
+            self._session.headers.update(_auth_headers(settings.token))
+
+        # Keep-alive pool + retry on gateway errors. POST is included: write_lp is
+        # idempotent (same series/timestamps overwrite) and query_sql is read-only.
+        # raise_on_status=False hands the last response back so our own HTTP errors still apply.
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.2,
+                status_forcelist=[502, 503, 504],
+                allowed_methods=frozenset({"GET", "POST"}),
+                raise_on_status=False,
+            ),
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+    def _require_auth(self) -> None:
+        if "Authorization" not in self._session.headers:
+            _auth_headers(self.settings.token)  # raises InfluxAuthError with the config hint
 
     def health(self) -> dict[str, Any]:
+        self._require_auth()
         url = f"{self.base_url}/health"
         r = self._session.get(
             url,
-            headers=_auth_headers(self.settings.token),
-            timeout=self._timeout(),
+            timeout=self._default_timeout,
         )
         if r.status_code == 401:
             raise InfluxAuthError("401 Unauthorized on /health. Check Bearer token.")
@@ -105,12 +145,13 @@ class InfluxClient:
 
     def write_lp(
         self,
-        lines: str,
+        lines: str | bytes,
         *,
         database: Optional[str] = None,
         precision: Optional[str] = None,
         accept_partial: bool = True,
         no_sync: bool = False,
+        compress: bool = True,
     ) -> InfluxWriteResult:
         db = database or self.settings.database
         prec = precision or self.settings.precision
@@ -118,6 +159,7 @@ class InfluxClient:
             raise InfluxConfigError("Influx database/db is empty.")
         if not prec:
             prec = "ns"
+        self._require_auth()
 
         url = f"{self.base_url}/api/v3/write_lp"
         params = {
@@ -127,12 +169,20 @@ class InfluxClient:
             "no_sync": "true" if no_sync else "false",
         }
 
+        # Line protocol repeats measurement/tag text on every row and gzips well.
+        # Small bodies go as-is: there the header + CPU cost outweighs the saving.
+        body = lines.encode("utf-8") if isinstance(lines, str) else lines
+        headers = _LP_HEADERS
+        if compress and len(body) > _GZIP_MIN_BYTES:
+            body = gzip.compress(body, compresslevel=1)
+            headers = _LP_GZIP_HEADERS
+
         r = self._session.post(
             url,
             params=params,
-            data=lines,
-            headers={**_auth_headers(self.settings.token), "Content-Type": "text/plain; charset=utf-8"},
-            timeout=self._timeout(),
+            data=body,
+            headers=headers,
+            timeout=self._default_timeout,
         )
 
         if r.status_code == 401:
@@ -148,6 +198,7 @@ class InfluxClient:
             raise InfluxConfigError("Influx database/db is empty.")
         if not query.strip():
             raise ValueError("query_sql: query is empty")
+        self._require_auth()
 
         url = f"{self.base_url}/api/v3/query_sql"
         payload = {"db": db, "q": query}
@@ -155,8 +206,8 @@ class InfluxClient:
         r = self._session.post(
             url,
             json=payload,
-            headers={**_auth_headers(self.settings.token), "Content-Type": "application/json"},
-            timeout=self._timeout(),
+            headers=_JSON_HEADERS,
+            timeout=self._default_timeout,
         )
 
         if r.status_code == 401:
@@ -167,20 +218,136 @@ class InfluxClient:
         return r.json()
 
 
-def pzem_reading_to_lp(
-    *,
-    measurement: str,
-    unit_id: int,
-    fields: dict[str, Any],
-    tags: Optional[dict[str, str]] = None,
-    ts_ns: Optional[int] = None,
-) -> str:
+class BufferedInfluxWriter:
     """
-    Build one line-protocol row.
-    - unit_id becomes a tag (unit=<id>)
-    - fields are written as numeric fields (ints get trailing i)
-    - ts_ns defaults to now (ns)
+    Accumulates line-protocol rows and posts them as one write_lp() batch once
+    max_lines rows are buffered or the oldest row is max_age_s old.
+      - add() only buffers; flushing happens in flush_if_due()/flush()
+      - background=False: the POST runs on the caller's thread and errors raise there
+      - background=True: the POST runs on one worker thread, so the caller (e.g.
+        the serial poll loop) keeps going meanwhile; a failed write raises from
+        the next flush_if_due()/flush()/close() call instead. At most one batch
+        is in flight: the next flush waits for the previous one first.
+      - a failed batch is dropped (same as an unbuffered failed write)
+      - no_sync=True skips the WAL sync wait between batches
     """
+    def __init__(
+        self,
+        client: InfluxClient,
+        *,
+        max_lines: int = 5000,
+        max_age_s: float = 2.0,
+        no_sync: bool = True,
+        background: bool = False,
+    ):
+        self.client = client
+        self.max_lines = max_lines
+        self.max_age_s = max_age_s
+        self.no_sync = no_sync
+        self.background = background
+        self._buf = bytearray()
+        self._lines = 0
+        self._oldest: Optional[float] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pending: Optional[Future[InfluxWriteResult]] = None
+
+    def __len__(self) -> int:
+        return self._lines
+
+    def __enter__(self) -> "BufferedInfluxWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            self.close()
+        except Exception:
+            # Don't mask the exception that is already unwinding
+            if exc_type is None:
+                raise
+
+    def add(self, line: str | bytes) -> None:
+        if self._oldest is None:
+            self._oldest = time.monotonic()
+        self._buf += line.encode("utf-8") if isinstance(line, str) else line
+        self._buf += b"\n"
+        self._lines += 1
+
+    def due(self) -> bool:
+        if self._oldest is None:
+            return False
+        return self._lines >= self.max_lines or (time.monotonic() - self._oldest) >= self.max_age_s
+
+    def flush_if_due(self) -> Optional[InfluxWriteResult]:
+        if self.due():
+            return self.flush()
+        # Surface a finished background write's error without waiting on one in flight
+        if self._pending is not None and self._pending.done():
+            return self._collect()
+        return None
+
+    def flush(self) -> Optional[InfluxWriteResult]:
+        """
+        Post the buffered rows. In background mode this returns (or raises) the
+        previous batch's outcome, not this one's; close() waits for the last one.
+        """
+        if not self._buf:
+            return self._collect()
+        payload = bytes(self._buf)
+        self._buf.clear()
+        self._lines = 0
+        self._oldest = None
+        if not self.background:
+            return self.client.write_lp(payload, no_sync=self.no_sync)
+
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="influx-write")
+        prev = self._pending
+        self._pending = self._executor.submit(self.client.write_lp, payload, no_sync=self.no_sync)
+        return prev.result() if prev is not None else None
+
+    def close(self) -> None:
+        """Flush what's buffered and wait for any background write to finish."""
+        try:
+            self.flush()
+            self._collect()
+        finally:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def _collect(self) -> Optional[InfluxWriteResult]:
+        # Outcome of the in-flight background write (waits for it), if any
+        fut, self._pending = self._pending, None
+        return fut.result() if fut is not None else None
+
+
+def _lp_field_str(v: Any) -> str:
+    s = str(v).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{s}"'
+
+
+def _lp_field_by_isinstance(v: Any) -> str:
+    # Slow path for subclasses (IntEnum, numpy scalars, ...): same rules as the table
+    if isinstance(v, bool):
+        return "true" if v else "false"
+    if isinstance(v, int):
+        return f"{v}i"
+    if isinstance(v, float):
+        return f"{v}"
+    return _lp_field_str(v)
+
+
+# Exact-type dispatch for field values (bool before int matters only for the slow path)
+_LP_FIELD_FMT: dict[type, Any] = {
+    bool: lambda v: "true" if v else "false",
+    int: lambda v: f"{v}i",
+    float: lambda v: f"{v}",
+    str: _lp_field_str,
+}
+
+
+def _lp_series(measurement: str, unit_id: int, tags: Optional[dict[str, str]]) -> str:
+    """Escaped "measurement,unit=<id>,tag=value..." prefix of a row."""
     if not measurement:
         raise ValueError("measurement is empty")
 
@@ -195,21 +362,32 @@ def pzem_reading_to_lp(
         for k, v in merged_tags.items()
         if v is not None
     )
+    return f"{m},{tag_str}"
+
+
+def pzem_reading_to_lp(
+    *,
+    measurement: str,
+    unit_id: int,
+    fields: dict[str, Any],
+    tags: Optional[dict[str, str]] = None,
+    ts_ns: Optional[int] = None,
+) -> str:
+    """
+    Build one line-protocol row.
+    - unit_id becomes a tag (unit=<id>)
+    - fields are written as numeric fields (ints get trailing i)
+    - ts_ns defaults to now (ns)
+    """
+    series = _lp_series(measurement, unit_id, tags)
 
+    fmt_table = _LP_FIELD_FMT
     fparts: list[str] = []
     for k, v in fields.items():
         if v is None:
             continue
-        key = _lp_escape_tag(str(k))
-        if isinstance(v, bool):
-            fparts.append(f"{key}={'true' if v else 'false'}")
-        elif isinstance(v, int):
-            fparts.append(f"{key}={v}i")
-        elif isinstance(v, float):
-            fparts.append(f"{key}={v}")
-        else:
-            s = str(v).replace("\\", "\\\\").replace('"', '\\"')
-            fparts.append(f'{key}="{s}"')
+        fmt = fmt_table.get(type(v), _lp_field_by_isinstance)
+        fparts.append(f"{_lp_escape_tag(str(k))}={fmt(v)}")
 
     if not fparts:
         raise ValueError("No fields to write (all fields were None/empty).")
@@ -217,4 +395,54 @@ def pzem_reading_to_lp(
     field_str = ",".join(fparts)
     ts = ts_ns if ts_ns is not None else time.time_ns()
 
-    return f"{m},{tag_str} {field_str} {ts}"
+    return f"{series} {field_str} {ts}"
+
+
+def build_pzem_lp(
+    *,
+    measurement: str,
+    unit_id: int,
+    voltage: float,
+    current: float,
+    power: float,
+    energy_wh: int,
+    raw_hv: int,
+    raw_lv: int,
+    tags: Optional[dict[str, str]] = None,
+    ts_ns: Optional[int] = None,
+) -> str:
+    """
+    The PZEM row with a fixed field set and order; same output as
+    pzem_reading_to_lp() with those fields, minus the per-field dict walk/dispatch.
+    """
+    series = _lp_series(measurement, unit_id, tags)
+    ts = ts_ns if ts_ns is not None else time.time_ns()
+    return (
+        f"{series} voltage={float(voltage)},current={float(current)},power={float(power)},"
+        f"energy_wh={int(energy_wh)}i,raw_hv={int(raw_hv)}i,raw_lv={int(raw_lv)}i {ts}"
+    )
+
+
+def make_pzem_lp_formatter(
+    measurement: str,
+    extra_tags: Optional[dict[str, str]] = None,
+) -> Callable[[PzemReading, int], str]:
+    """
+    Build a row formatter for one (measurement, tag set), for the polling loop.
+    Escaping and tag joining happen here, once; the returned fmt(reading, ts_ns)
+    only drops the unit id and field values into a prebuilt template.
+    Output matches build_pzem_lp() for the same inputs.
+    """
+    # Placeholder stands in for the unit id so _lp_series() keeps tag order/override rules
+    marker = "\x00unit\x00"
+    series = _lp_series(measurement, marker, extra_tags)  # type: ignore[arg-type]
+    template = (
+        series.replace("{", "{{").replace("}", "}}").replace(marker, "{0}")
+        + " voltage={1},current={2},power={3},energy_wh={4}i,raw_hv={5}i,raw_lv={6}i {7}"
+    )
+    fmt = template.format
+
+    def format_reading(r: PzemReading, ts_ns: int) -> str:
+        return fmt(r.unit_id, r.voltage, r.current, r.power, r.energy_wh, r.raw_hv, r.raw_lv, ts_ns)
+
+    return format_reading
@@ -2,16 +2,63 @@ from __future__ import annotations
 
 import os
 import stat
+import time
 from collections.abc import Iterable, Mapping
+from functools import lru_cache
 from typing import Any
 
+# Port checks are cached per path for roughly this long, so reconnect retries
+# don't re-stat the same device nodes on every attempt.
+_PORT_CHECK_TTL_S = 5.0
 
-def _port_usable(p: str) -> bool:
+
+@lru_cache(maxsize=1)
+def _credentials() -> tuple[int, frozenset[int]] | None:
+    """(euid, gids) of this process, or None where POSIX ids don't apply."""
+    try:
+        return os.geteuid(), frozenset(os.getgroups()) | {os.getegid()}
+    except AttributeError:
+        return None
+
+
+def _mode_allows_rw(st: os.stat_result) -> bool:
+    """
+    Read/write check from the stat() we already have, instead of a second
+    syscall via os.access(). Ignores ACLs; connect() is still the final word.
+    """
+    creds = _credentials()
+    if creds is None:
+        return True
+    euid, gids = creds
+    if euid == 0:
+        return True
+    if st.st_uid == euid:
+        need = stat.S_IRUSR | stat.S_IWUSR
+    elif st.st_gid in gids:  # e.g. /dev/ttyUSB0 via the dialout group
+        need = stat.S_IRGRP | stat.S_IWGRP
+    else:
+        need = stat.S_IROTH | stat.S_IWOTH
+    return (st.st_mode & need) == need
+
+
+def port_usable(p: str) -> bool:
+    """
+    True if p is a character device this process can open read/write.
+    Cached per path for ~_PORT_CHECK_TTL_S seconds.
+    """
+    return _port_usable_at(p, int(time.monotonic() // _PORT_CHECK_TTL_S))
+
+
+def clear_port_cache() -> None:
+    """Forget cached port_usable() results, e.g. before re-resolving after a disconnect."""
+    _port_usable_at.cache_clear()
+
+
+@lru_cache(maxsize=32)
+def _port_usable_at(p: str, _ttl_bucket: int) -> bool:
     try:
         st = os.stat(p)
-        if not stat.S_ISCHR(st.st_mode):
-            return False
-        return os.access(p, os.R_OK | os.W_OK)
+        return stat.S_ISCHR(st.st_mode) and _mode_allows_rw(st)
     except FileNotFoundError:
         return False
     except Exception:
@@ -24,6 +71,8 @@ def _as_port_candidates(raw: Any) -> list[str]:
         return []
     if isinstance(raw, str):
         return [raw]
+    if isinstance(raw, list) and all(isinstance(p, str) for p in raw):
+        return list(raw)  # the usual TOML shape; copy, don't str() each item
     if isinstance(raw, dict):
         return []
     if isinstance(raw, Iterable):
@@ -31,6 +80,20 @@ def _as_port_candidates(raw: Any) -> list[str]:
     return []
 
 
+def _modbus_section(cfg: Mapping[str, Any] | None) -> dict[str, Any]:
+    # Accept either the whole config (with a [modbus] table) or the table itself
+    raw_cfg = cfg or {}
+    section = raw_cfg.get("modbus")
+    return dict(section if isinstance(section, Mapping) else raw_cfg)
+
+
+def _port_settings(cfg: Mapping[str, Any] | None) -> tuple[list[str], str]:
+    """(configured candidates in order, legacy port) from cfg."""
+    modbus_cfg = _modbus_section(cfg)
+    ports_raw = modbus_cfg.get("ports") or modbus_cfg.get("port_candidates")
+    return _as_port_candidates(ports_raw), str(modbus_cfg.get("port", "/dev/ttyUSB0"))
+
+
 def resolve_modbus_port(cfg: Mapping[str, Any] | None) -> str:
     """
     Backward compatible + safe:
@@ -38,18 +101,24 @@ def resolve_modbus_port(cfg: Mapping[str, Any] | None) -> str:
         pick first usable in order.
       - Else use cfg['modbus']['port'] (legacy).
     """
-    raw_cfg = cfg or {}
-    if "modbus" in raw_cfg and isinstance(raw_cfg.get("modbus"), Mapping):
-        modbus_cfg = dict(raw_cfg.get("modbus") or {})
-    else:
-        modbus_cfg = dict(raw_cfg)
+    port_candidates, legacy = _port_settings(cfg)
+    for port in port_candidates:
+        if port_usable(port):
+            return port
+    # None usable (or none configured) -> fall back to legacy port
+    return legacy
 
-    ports_raw = modbus_cfg.get("ports") or modbus_cfg.get("port_candidates")
-    port_candidates = _as_port_candidates(ports_raw)
-    if port_candidates:
-        for port in port_candidates:
-            if _port_usable(port):
-                return port
-        # None usable -> fall back to legacy port
-
-    return str(modbus_cfg.get("port", "/dev/ttyUSB0"))
+
+def resolve_modbus_ports(cfg: Mapping[str, Any] | None) -> list[str]:
+    """
+    Every port resolve_modbus_port() could pick, in preference order:
+    configured candidates, then the legacy port (always last, never dropped).
+    Not filtered by port_usable(): a node missing right now (e.g. mid USB
+    re-enumeration) may be back by the next retry, so retry loops keep the
+    whole list and check each port as they reach it.
+    """
+    port_candidates, legacy = _port_settings(cfg)
+    ports = list(dict.fromkeys(port_candidates))
+    if legacy not in ports:
+        ports.append(legacy)
+    return ports
@@ -1,19 +1,29 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from contextlib import contextmanager
-from typing import Optional, Iterator, Literal, Any, Dict, List
+from contextlib import ExitStack, contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Iterator, Literal, Any, Dict, List
+import atexit
 import inspect
+import struct
+import threading
 import time
 
-from pymodbus.client import ModbusSerialClient
-
+from config import pzem as pzem_config
 from config.behavior import VERBOSE_READ_DEFAULT
 from config.pzem import (
-    METHOD, SERIAL_PORT, BAUDRATE, BYTESIZE,
+    METHOD, BAUDRATE, BYTESIZE,
     STOPBITS, PARITY, TIMEOUT, ABNORMAL_CODES,
 )
 
+# Config values are fixed for the life of the process; convert once, not per transaction.
+_TIMEOUT_F: float = float(TIMEOUT)
+
+# pymodbus is heavy to import; only pull it in when a client is actually built.
+if TYPE_CHECKING:
+    from pymodbus.client import ModbusSerialClient
+
 # ---------------------------------------------------------------------
 # Exceptions
 # ---------------------------------------------------------------------
@@ -22,12 +32,31 @@ class PzemError(Exception):
     """Base exception for PZEM utility operations."""
 
 
+class _LazyHex:
+    """Frame bytes rendered as spaced hex only when str()'d."""
+    __slots__ = ("data",)
+
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def __str__(self) -> str:
+        return self.data.hex(" ")
+
+
 class PzemModbusError(PzemError):
-    """Raised when a Modbus RTU exchange fails or returns an exception frame."""
-    def __init__(self, message: str, *, unit_id: int, detail: Optional[str] = None):
+    """
+    Raised when a Modbus RTU exchange fails or returns an exception frame.
+    detail may be passed as a _LazyHex: most of these errors are swallowed by
+    read_pzem(), so the hex dump is only formatted if someone reads .detail.
+    """
+    def __init__(self, message: str, *, unit_id: int, detail: Optional[str | _LazyHex] = None):
         super().__init__(message)
         self.unit_id = unit_id
-        self.detail = detail
+        self._detail = detail
+
+    @property
+    def detail(self) -> Optional[str]:
+        return None if self._detail is None else str(self._detail)
 
 
 class PzemRawCommandError(PzemError):
@@ -50,16 +79,29 @@ def _require_unit_id(unit_id: int) -> None:
 def _get_serial_port_from_client(client: ModbusSerialClient):
     """
     pymodbus serial client exposes the underlying pyserial object as client.socket (after connect()).
+    The checked object is cached on the client as _pzem_ser; _forget_serial_port() drops it
+    when the client is closed, so a reconnect resolves the new socket.
     """
+    ser = getattr(client, "_pzem_ser", None)
+    if ser is not None:
+        return ser
     ser = getattr(client, "socket", None)
     if ser is None or not hasattr(ser, "write") or not hasattr(ser, "read"):
         raise PzemError(
             "Could not access underlying serial port from ModbusSerialClient "
             "(expected client.socket after client.connect())."
         )
+    client._pzem_ser = ser
     return ser
 
 
+def _forget_serial_port(client: ModbusSerialClient) -> None:
+    try:
+        del client._pzem_ser
+    except AttributeError:
+        pass
+
+
 def _best_effort_flush(ser) -> None:
     try:
         if hasattr(ser, "reset_input_buffer"):
@@ -77,16 +119,47 @@ def _best_effort_flush(ser) -> None:
 CrcOrder = Literal["little", "big"]
 
 
+def _bit_crc(i: int) -> int:
+    # The 8 shift/xor rounds for one byte value; only used to build the table.
+    crc = i
+    for _ in range(8):
+        crc = (crc >> 1) ^ 0xA001 if (crc & 1) else (crc >> 1)
+    return crc
+
+
+_CRC16_TABLE: tuple[int, ...] = tuple(_bit_crc(i) for i in range(256))
+
+
+def _table_crc16(data: bytes) -> int:
+    # Byte-wise table lookup instead of 8 bit rounds per byte.
+    tbl = _CRC16_TABLE
+    crc = 0xFFFF
+    for b in data:
+        crc = (crc >> 8) ^ tbl[(crc ^ b) & 0xFF]
+    return crc
+
+
+# Optional native fast path: crcmod's predefined "modbus" CRC, but only when its
+# C extension is built (its pure-Python fallback is no faster than the table).
+# (Import the flag from the submodule: inside the package, the name crcmod.crcmod
+# is rebound to the package itself, which has no _usingExtension.)
+try:
+    from crcmod.crcmod import _usingExtension as _crcmod_native  # type: ignore
+    from crcmod.predefined import mkPredefinedCrcFun  # type: ignore
+except ImportError:
+    _crc16_impl = _table_crc16
+else:
+    if _crcmod_native:
+        _crc16_impl = mkPredefinedCrcFun("modbus")
+    else:
+        _crc16_impl = _table_crc16
+
+
 def crc16_modbus(data: bytes) -> int:
     """
     CRC16-Modbus (poly 0xA001), returns 0..65535.
     """
-    crc = 0xFFFF
-    for b in data:
-        crc ^= b
-        for _ in range(8):
-            crc = (crc >> 1) ^ 0xA001 if (crc & 1) else (crc >> 1)
-    return crc & 0xFFFF
+    return _crc16_impl(data)
 
 
 def append_crc(data: bytes, *, crc_order: CrcOrder = "little") -> bytes:
@@ -100,23 +173,23 @@ def append_crc(data: bytes, *, crc_order: CrcOrder = "little") -> bytes:
 
 
 def _check_crc(frame: bytes) -> bool:
-    if len(frame) < 3:
-        return False
-    data = frame[:-2]
-    rx_lo = frame[-2]
-    rx_hi = frame[-1]
-    rx = rx_lo | (rx_hi << 8)
-    calc = crc16_modbus(data)
-    return rx == calc
+    # Running the CRC over data + its own (low-byte-first) CRC leaves 0 for an
+    # intact frame, so no slicing or reassembling the received CRC.
+    return len(frame) >= 3 and crc16_modbus(frame) == 0
 
 
 def _read_exact(ser, n: int, timeout_s: float) -> bytes:
     """
     Read up to n bytes, returning fewer on timeout.
-    Uses a monotonic deadline in addition to pyserial timeout for robustness.
+    One ser.read(n) normally gets the whole frame (pyserial waits natively, see
+    configure_serial_timeouts()); only a short read falls back to the loop, which
+    uses a monotonic deadline in addition to pyserial timeout for robustness.
     """
     deadline = time.monotonic() + float(timeout_s)
-    buf = bytearray()
+    first = ser.read(n)
+    if len(first) >= n:
+        return first
+    buf = bytearray(first)
     while len(buf) < n and time.monotonic() < deadline:
         chunk = ser.read(n - len(buf))
         if chunk:
@@ -132,6 +205,23 @@ def _read_exact(ser, n: int, timeout_s: float) -> bytes:
 # Raw Modbus RTU helpers (stable across pymodbus versions)
 # ---------------------------------------------------------------------
 
+# FC03/FC04 read and FC06 write requests share one layout:
+# [unit][fc][addr hi/lo][count or value hi/lo]
+_pack_request = struct.Struct(">BBHH").pack
+
+
+@lru_cache(maxsize=256)
+def _build_read_req(unit_id: int, function_code: int, start_addr: int, count: int) -> bytes:
+    # A poller sends the same few requests every cycle (e.g. (uid, 0x04, 0, 8) per unit);
+    # build each CRC'd frame once.
+    return append_crc(_pack_request(unit_id, function_code, start_addr, count))
+
+
+@lru_cache(maxsize=None)
+def _regs_fmt(count: int) -> str:
+    return f">{count}H"
+
+
 def _rtu_read_registers(
     ser,
     *,
@@ -153,13 +243,21 @@ def _rtu_read_registers(
     if not (0 <= start_addr <= 0xFFFF) or not (1 <= count <= 0x7D):  # Modbus typical max 125 regs
         raise ValueError("Invalid start_addr/count")
 
-    req = bytes([
-        unit_id,
-        function_code,
-        (start_addr >> 8) & 0xFF, start_addr & 0xFF,
-        (count >> 8) & 0xFF, count & 0xFF,
-    ])
-    req = append_crc(req)
+    return _rtu_read(ser, unit_id, function_code, start_addr, count, timeout_s)
+
+
+def _rtu_read_input(ser, *, unit_id: int, start: int, count: int, timeout_s: float = _TIMEOUT_F) -> List[int]:
+    """
+    FC04 (input registers) read for the PZEM polling path. Skips the argument
+    validation in _rtu_read_registers(): callers pass a checked unit id and
+    constant start/count.
+    """
+    return _rtu_read(ser, unit_id, 0x04, start, count, timeout_s)
+
+
+def _rtu_read(ser, unit_id: int, function_code: int, start_addr: int, count: int, timeout_s: float) -> List[int]:
+    # Unchecked request/response exchange shared by the read helpers above.
+    req = _build_read_req(unit_id, function_code, start_addr, count)
 
     _best_effort_flush(ser)
     ser.write(req)
@@ -180,53 +278,48 @@ def _rtu_read_registers(
         tail = _read_exact(ser, 2, timeout_s)
         frame = hdr + tail
         if len(frame) < 5:
-            raise PzemModbusError("Truncated exception response", unit_id=unit_id, detail=frame.hex(" "))
+            raise PzemModbusError("Truncated exception response", unit_id=unit_id, detail=_LazyHex(frame))
         if not _check_crc(frame):
-            raise PzemModbusError("Bad CRC on exception response", unit_id=unit_id, detail=frame.hex(" "))
+            raise PzemModbusError("Bad CRC on exception response", unit_id=unit_id, detail=_LazyHex(frame))
         exc = frame[2]
         msg = ABNORMAL_CODES.get(exc, f"Unknown abnormal code 0x{exc:02X}")
-        raise PzemModbusError(f"Modbus exception 0x{exc:02X} ({msg})", unit_id=unit_id, detail=frame.hex(" "))
+        raise PzemModbusError(f"Modbus exception 0x{exc:02X} ({msg})", unit_id=unit_id, detail=_LazyHex(frame))
 
     if fc != function_code:
         raise PzemModbusError(
             f"Unexpected function code 0x{fc:02X} (expected 0x{function_code:02X})",
             unit_id=unit_id,
-            detail=hdr.hex(" "),
+            detail=_LazyHex(hdr),
         )
 
     bytecount = hdr[2]
     expected_data_bytes = 2 * count
-    if bytecount != expected_data_bytes:
-        # still try to read whatever device claims, but validate after
-        pass
+    # still read whatever the device claims (keeps the bus in sync), validate after
 
     # Remaining: data bytes + CRC(2)
     tail = _read_exact(ser, int(bytecount) + 2, timeout_s)
     frame = hdr + tail
 
     if len(frame) < 3 + bytecount + 2:
-        raise PzemModbusError("Truncated data response", unit_id=unit_id, detail=frame.hex(" "))
+        raise PzemModbusError("Truncated data response", unit_id=unit_id, detail=_LazyHex(frame))
 
     if not _check_crc(frame):
-        raise PzemModbusError("Bad CRC on data response", unit_id=unit_id, detail=frame.hex(" "))
+        raise PzemModbusError("Bad CRC on data response", unit_id=unit_id, detail=_LazyHex(frame))
 
-    data = frame[3:3 + bytecount]
-    if len(data) % 2 != 0:
-        raise PzemModbusError("Odd data length in response", unit_id=unit_id, detail=frame.hex(" "))
-
-    regs: List[int] = []
-    for i in range(0, len(data), 2):
-        regs.append((data[i] << 8) | data[i + 1])
+    if bytecount % 2 != 0:
+        raise PzemModbusError("Odd data length in response", unit_id=unit_id, detail=_LazyHex(frame))
 
     # If device returned fewer regs than requested, that's a protocol violation for our use.
-    if len(regs) < count:
+    # (unpack_from below would otherwise read into the CRC bytes.)
+    if bytecount < expected_data_bytes:
         raise PzemModbusError(
-            f"Device returned {len(regs)} registers (expected {count})",
+            f"Device returned {bytecount // 2} registers (expected {count})",
             unit_id=unit_id,
-            detail=frame.hex(" "),
+            detail=_LazyHex(frame),
         )
 
-    return regs[:count]
+    # Big-endian 16-bit registers straight out of the frame; extras beyond count are ignored
+    return list(struct.unpack_from(_regs_fmt(count), frame, 3))
 
 
 def _rtu_write_single_register(
@@ -246,13 +339,7 @@ def _rtu_write_single_register(
     if not (0 <= addr <= 0xFFFF) or not (0 <= value <= 0xFFFF):
         raise ValueError("Invalid addr/value")
 
-    req = bytes([
-        unit_id,
-        0x06,
-        (addr >> 8) & 0xFF, addr & 0xFF,
-        (value >> 8) & 0xFF, value & 0xFF,
-    ])
-    req = append_crc(req)
+    req = append_crc(_pack_request(unit_id, 0x06, addr, value))
 
     _best_effort_flush(ser)
     ser.write(req)
@@ -261,7 +348,7 @@ def _rtu_write_single_register(
 
     resp = _read_exact(ser, 8, timeout_s)
     if len(resp) < 5:
-        raise PzemModbusError("No response / truncated write reply", unit_id=unit_id, detail=resp.hex(" "))
+        raise PzemModbusError("No response / truncated write reply", unit_id=unit_id, detail=_LazyHex(resp))
 
     # Exception reply for FC06 would be 5 bytes
     if len(resp) >= 5 and resp[1] == (0x06 | 0x80):
@@ -269,20 +356,20 @@ def _rtu_write_single_register(
         if len(resp) < 5:
             resp += _read_exact(ser, 5 - len(resp), timeout_s)
         if not _check_crc(resp[:5]):
-            raise PzemModbusError("Bad CRC on exception write reply", unit_id=unit_id, detail=resp.hex(" "))
+            raise PzemModbusError("Bad CRC on exception write reply", unit_id=unit_id, detail=_LazyHex(resp))
         exc = resp[2]
         msg = ABNORMAL_CODES.get(exc, f"Unknown abnormal code 0x{exc:02X}")
-        raise PzemModbusError(f"Modbus exception 0x{exc:02X} ({msg})", unit_id=unit_id, detail=resp.hex(" "))
+        raise PzemModbusError(f"Modbus exception 0x{exc:02X} ({msg})", unit_id=unit_id, detail=_LazyHex(resp))
 
     if len(resp) < 8:
         # Try to read remaining bytes if partially received
         resp += _read_exact(ser, 8 - len(resp), timeout_s)
 
     if len(resp) != 8:
-        raise PzemModbusError("Truncated FC06 echo reply", unit_id=unit_id, detail=resp.hex(" "))
+        raise PzemModbusError("Truncated FC06 echo reply", unit_id=unit_id, detail=_LazyHex(resp))
 
     if not _check_crc(resp):
-        raise PzemModbusError("Bad CRC on FC06 echo reply", unit_id=unit_id, detail=resp.hex(" "))
+        raise PzemModbusError("Bad CRC on FC06 echo reply", unit_id=unit_id, detail=_LazyHex(resp))
 
     if resp != req:
         raise PzemModbusError(
@@ -305,40 +392,129 @@ def _rtu_framer_kw() -> Dict[str, Any]:
         return {}
 
 
-def make_modbus_client() -> ModbusSerialClient:
+@lru_cache(maxsize=1)
+def _has_method_kwarg() -> bool:
+    # Some builds accept method=..., some don't; probe once, on first use.
+    from pymodbus.client import ModbusSerialClient
+    try:
+        return "method" in inspect.signature(ModbusSerialClient.__init__).parameters
+    except (ValueError, TypeError):
+        return False
+
+
+def make_modbus_client(port: Optional[str] = None) -> ModbusSerialClient:
     """
     Create a ModbusSerialClient using shared config values.
     Only passes constructor args that exist in this pymodbus build.
+    port defaults to SERIAL_PORT, read at call time (lazy in config.pzem, and the poller may patch it).
     """
+    from pymodbus.client import ModbusSerialClient
+
     kwargs: Dict[str, Any] = {
-        "port": str(SERIAL_PORT),
+        "port": str(port or pzem_config.SERIAL_PORT),
         "baudrate": int(BAUDRATE),
         "bytesize": int(BYTESIZE),
         "stopbits": int(STOPBITS),
         "parity": str(PARITY),
-        "timeout": float(TIMEOUT),
+        "timeout": _TIMEOUT_F,
     }
 
-    # Some builds accept method=..., some don't.
-    try:
-        sig = inspect.signature(ModbusSerialClient.__init__)
-        if "method" in sig.parameters:
-            kwargs["method"] = METHOD
-    except Exception:
-        pass
+    if _has_method_kwarg():
+        kwargs["method"] = METHOD
 
     kwargs.update(_rtu_framer_kw())
     return ModbusSerialClient(**kwargs)
 
 
+# Gap that ends a frame early: RTU frames end after 3.5 character times of
+# silence (~4 ms at 9600 baud); a bit more than that tolerates USB latency.
+_INTER_BYTE_TIMEOUT_S = 0.01
+
+
+def configure_serial_timeouts(client: ModbusSerialClient) -> None:
+    """
+    After connect(): set pyserial's timeout and inter_byte_timeout so a single
+    read(n) in _read_exact() returns the whole reply (or times out) natively.
+    Best effort; ports without these attributes keep the read loop.
+    """
+    ser = getattr(client, "socket", None)
+    if ser is None:
+        return
+    try:
+        ser.timeout = _TIMEOUT_F
+        ser.inter_byte_timeout = _INTER_BYTE_TIMEOUT_S
+    except Exception:
+        pass
+
+
 @contextmanager
-def pzem_client() -> Iterator[ModbusSerialClient]:
-    client = make_modbus_client()
+def pzem_client(port: Optional[str] = None) -> Iterator[ModbusSerialClient]:
+    client = make_modbus_client(port)
     try:
         if not client.connect():
-            raise RuntimeError(f"Could not open {SERIAL_PORT}")
+            raise RuntimeError(f"Could not open {port or pzem_config.SERIAL_PORT}")
+        configure_serial_timeouts(client)
         yield client
     finally:
+        _forget_serial_port(client)
+        try:
+            client.close()
+        except Exception:
+            pass
+
+
+@contextmanager
+def pzem_clients(ports: List[str]) -> Iterator[List[ModbusSerialClient]]:
+    """
+    One connected client per port (e.g. separate RS485 buses), in the same order.
+    All are closed on exit; if any port fails to open, the ones already open are closed.
+    """
+    with ExitStack() as stack:
+        yield [stack.enter_context(pzem_client(port)) for port in ports]
+
+
+# ---------------------------------------------------------------------
+# Shared process-wide client (long-running pollers)
+# ---------------------------------------------------------------------
+
+# One open port per process instead of an open/close per scope. Hold the lock
+# around every exchange on the shared client: RS485 is half-duplex, so
+# concurrent callers must take turns on the bus anyway. Reentrant, so the
+# helpers below can be called while holding it.
+SHARED_CLIENT_LOCK = threading.RLock()
+_CLIENT: Optional[ModbusSerialClient] = None
+_ATEXIT_REGISTERED = False
+
+
+def get_shared_client(port: Optional[str] = None) -> ModbusSerialClient:
+    """
+    The shared, connected client; opened on first use (on port, default SERIAL_PORT)
+    and closed at interpreter exit. port only matters while no client is open:
+    call close_shared_client() first to move to another port.
+    Raises RuntimeError if the port can't be opened.
+    """
+    global _CLIENT, _ATEXIT_REGISTERED
+    with SHARED_CLIENT_LOCK:
+        if _CLIENT is None:
+            client = make_modbus_client(port)
+            if not client.connect():
+                raise RuntimeError(f"Could not open {port or pzem_config.SERIAL_PORT}")
+            configure_serial_timeouts(client)
+            _CLIENT = client
+            if not _ATEXIT_REGISTERED:
+                atexit.register(close_shared_client)
+                _ATEXIT_REGISTERED = True
+        return _CLIENT
+
+
+def close_shared_client() -> None:
+    """Close the shared client (if open); the next get_shared_client() reopens."""
+    global _CLIENT
+    with SHARED_CLIENT_LOCK:
+        client, _CLIENT = _CLIENT, None
+        if client is None:
+            return
+        _forget_serial_port(client)
         try:
             client.close()
         except Exception:
@@ -355,7 +531,7 @@ class PzemReading:
     voltage: float
     current: float
     power: float
-    energy_wh: float
+    energy_wh: int  # register pair is whole Wh; written to Influx as an integer field
     raw_hv: int
     raw_lv: int
     raw_regs: list[int]
@@ -377,14 +553,7 @@ def read_pzem(
     ser = _get_serial_port_from_client(client)
 
     try:
-        regs = _rtu_read_registers(
-            ser,
-            unit_id=unit_id,
-            function_code=0x04,
-            start_addr=0x0000,
-            count=8,
-            timeout_s=float(TIMEOUT),
-        )
+        regs = _rtu_read_input(ser, unit_id=unit_id, start=0x0000, count=8)
     except PzemModbusError as e:
         if log_errors:
             name = label or f"unit {unit_id}"
@@ -396,14 +565,14 @@ def read_pzem(
     voltage = raw_v / 100.0
     current = raw_i / 100.0
     power = ((raw_pH << 16) | raw_pL) / 10.0
-    energy_wh = ((raw_eH << 16) | raw_eL) * 1.0
+    energy_wh = (raw_eH << 16) | raw_eL
 
     reading = PzemReading(
         unit_id=int(unit_id),
         voltage=float(voltage),
         current=float(current),
         power=float(power),
-        energy_wh=float(energy_wh),
+        energy_wh=energy_wh,
         raw_hv=int(raw_hv),
         raw_lv=int(raw_lv),
         raw_regs=list(regs),
@@ -444,7 +613,7 @@ def read_params(client: ModbusSerialClient, unit_id: int) -> PzemParams:
         function_code=0x03,
         start_addr=0x0000,
         count=4,
-        timeout_s=float(TIMEOUT),
+        timeout_s=_TIMEOUT_F,
     )
 
     hv_raw, lv_raw, addr, shunt_code = regs
@@ -462,7 +631,7 @@ def set_high_voltage_threshold(client: ModbusSerialClient, unit_id: int, volts:
         raise ValueError("High voltage threshold must be between 5 and 350 V.")
     value = int(round(volts * 100))
     ser = _get_serial_port_from_client(client)
-    _rtu_write_single_register(ser, unit_id=unit_id, addr=0x0000, value=value, timeout_s=float(TIMEOUT))
+    _rtu_write_single_register(ser, unit_id=unit_id, addr=0x0000, value=value, timeout_s=_TIMEOUT_F)
 
 
 def set_low_voltage_threshold(client: ModbusSerialClient, unit_id: int, volts: float) -> None:
@@ -471,14 +640,14 @@ def set_low_voltage_threshold(client: ModbusSerialClient, unit_id: int, volts: f
         raise ValueError("Low voltage threshold must be between 1 and 350 V.")
     value = int(round(volts * 100))
     ser = _get_serial_port_from_client(client)
-    _rtu_write_single_register(ser, unit_id=unit_id, addr=0x0001, value=value, timeout_s=float(TIMEOUT))
+    _rtu_write_single_register(ser, unit_id=unit_id, addr=0x0001, value=value, timeout_s=_TIMEOUT_F)
 
 
 def set_unit_address(client: ModbusSerialClient, current_unit_id: int, new_unit_id: int) -> None:
     _require_unit_id(current_unit_id)
     _require_unit_id(new_unit_id)
     ser = _get_serial_port_from_client(client)
-    _rtu_write_single_register(ser, unit_id=current_unit_id, addr=0x0002, value=int(new_unit_id), timeout_s=float(TIMEOUT))
+    _rtu_write_single_register(ser, unit_id=current_unit_id, addr=0x0002, value=int(new_unit_id), timeout_s=_TIMEOUT_F)
 
 
 def set_shunt_code(client: ModbusSerialClient, unit_id: int, shunt_code: int) -> None:
@@ -486,7 +655,7 @@ def set_shunt_code(client: ModbusSerialClient, unit_id: int, shunt_code: int) ->
     if shunt_code not in (0, 1, 2, 3):
         raise ValueError("shunt_code must be one of: 0, 1, 2, 3")
     ser = _get_serial_port_from_client(client)
-    _rtu_write_single_register(ser, unit_id=unit_id, addr=0x0003, value=int(shunt_code), timeout_s=float(TIMEOUT))
+    _rtu_write_single_register(ser, unit_id=unit_id, addr=0x0003, value=int(shunt_code), timeout_s=_TIMEOUT_F)
 
 
 # ---------------------------------------------------------------------
@@ -509,7 +678,7 @@ def reset_energy(client: ModbusSerialClient, unit_id: int) -> None:
     if hasattr(ser, "flush"):
         ser.flush()
 
-    hdr = _read_exact(ser, 2, float(TIMEOUT))
+    hdr = _read_exact(ser, 2, _TIMEOUT_F)
     if len(hdr) < 2:
         raise PzemRawCommandError("Reset energy: no response", unit_id=unit_id)
 
@@ -517,7 +686,7 @@ def reset_energy(client: ModbusSerialClient, unit_id: int) -> None:
         raise PzemRawCommandError(f"Reset energy: unexpected responder 0x{hdr[0]:02X}", unit_id=unit_id)
 
     if hdr[1] == 0x42:
-        tail = _read_exact(ser, 2, float(TIMEOUT))
+        tail = _read_exact(ser, 2, _TIMEOUT_F)
         frame = hdr + tail
         if len(frame) != 4 or not _check_crc(frame):
             raise PzemRawCommandError("Reset energy: bad CRC / truncated OK reply", unit_id=unit_id)
@@ -526,7 +695,7 @@ def reset_energy(client: ModbusSerialClient, unit_id: int) -> None:
         return
 
     if hdr[1] == 0xC2:
-        rest = _read_exact(ser, 3, float(TIMEOUT))
+        rest = _read_exact(ser, 3, _TIMEOUT_F)
         frame = hdr + rest
         if len(frame) != 5 or not _check_crc(frame):
             raise PzemRawCommandError("Reset energy: bad CRC / truncated error reply", unit_id=unit_id)